@@ -0,0 +1,9 @@
+from .singleflight import SingleFlight, coalesce
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+__all__ = [
+    "SingleFlight",
+    "coalesce",
+    "CircuitBreaker",
+    "CircuitOpenError"
+]
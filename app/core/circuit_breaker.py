@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Dict
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: la llamada se rechaza sin intentar la conexión"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Circuit breaker abierto")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Circuit breaker con estados closed, open y half_open.
+
+    Se abre tras ``failure_threshold`` fallos consecutivos. Pasados
+    ``reset_timeout`` segundos pasa a half_open y deja pasar una sola llamada
+    de prueba: si tiene éxito el circuito se cierra, si falla se vuelve a abrir.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._retry_after() <= 0:
+                return self.HALF_OPEN
+            return self._state
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self.reset_timeout - time.monotonic()
+
+    def retry_after(self) -> float:
+        """Segundos hasta la próxima llamada de prueba (0 si el circuito no está abierto)"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0
+            return max(self._retry_after(), 0)
+
+    def before_call(self) -> bool:
+        """Comprobar si se permite la llamada; lanza CircuitOpenError si no.
+
+        Devuelve True si la llamada es la prueba del estado half_open.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN:
+                retry_after = self._retry_after()
+                if retry_after > 0:
+                    raise CircuitOpenError(retry_after)
+                self._state = self.HALF_OPEN
+            # half_open: solo una llamada de prueba a la vez
+            if self._probing:
+                raise CircuitOpenError(0)
+            self._probing = True
+            return True
+
+    def record_success(self, probe: bool = False):
+        with self._lock:
+            self._failures = 0
+            # Solo la prueba puede cerrar un circuito abierto o half_open
+            if probe or self._state == self.CLOSED:
+                self._state = self.CLOSED
+                self._probing = False
+
+    def record_failure(self, probe: bool = False):
+        with self._lock:
+            self._failures += 1
+            if probe or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            if probe:
+                self._probing = False
+
+    def release(self, probe: bool = False):
+        """Liberar la prueba sin contarla como éxito ni como fallo"""
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    def snapshot(self) -> Dict:
+        """Estado actual del circuito para reportes de salud"""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "failures": self._failures,
+                "retry_after": round(max(self._retry_after(), 0), 2) if state == self.OPEN else 0,
+            }
@@ -0,0 +1,283 @@
+import asyncio
+import collections
+import concurrent.futures.thread
+import contextvars
+import functools
+import os
+import selectors
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import anyio.to_thread
+from sqlalchemy import event
+
+# Configuración del modo de perfilado (desactivado por defecto)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_HEADER = "X-Profile"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_REPEAT_THRESHOLD = int(os.getenv("PROFILE_REPEAT_THRESHOLD", "3"))
+PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", "100"))
+PROFILE_MAX_STATEMENTS = int(os.getenv("PROFILE_MAX_STATEMENTS", "50"))
+PROFILE_TOP_N = 20
+
+_current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+# Marcos de infraestructura (hilos, event loop, threadpool) que no se reportan
+_IGNORED_FRAME_PREFIXES = tuple(
+    os.path.splitext(module.__file__)[0]
+    for module in (threading, asyncio.events, asyncio.base_events, selectors, concurrent.futures.thread)
+) + (os.path.dirname(asyncio.__file__) + os.sep, os.path.dirname(anyio.__file__) + os.sep)
+
+
+class StackSampler:
+    """Profiler estadístico: muestrea periódicamente las pilas de los hilos de la petición.
+
+    Solo se muestrean los hilos del threadpool mientras ejecutan handlers o
+    dependencias síncronas de la petición. El hilo del event loop se comparte
+    con el resto de peticiones, por lo que el tiempo de handlers async no se
+    muestrea.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples: collections.Counter = collections.Counter()
+        self.total = 0
+        self._threads: collections.Counter = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_thread(self, thread_id: int):
+        with self._lock:
+            self._threads[thread_id] += 1
+
+    def remove_thread(self, thread_id: int):
+        with self._lock:
+            self._threads[thread_id] -= 1
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.total += 1
+            with self._lock:
+                thread_ids = set(self._threads)
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                # Hilo detenido en código de infraestructura: no está trabajando en la petición
+                if frame is None or frame.f_code.co_filename.startswith(_IGNORED_FRAME_PREFIXES):
+                    continue
+                # Contar cada función una sola vez por muestra (tiempo inclusivo)
+                seen = set()
+                while frame is not None:
+                    code = frame.f_code
+                    if not code.co_filename.startswith(_IGNORED_FRAME_PREFIXES):
+                        location = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                        if location not in seen:
+                            seen.add(location)
+                            self.samples[location] += 1
+                    frame = frame.f_back
+
+    def top(self, limit: int = PROFILE_TOP_N) -> List[Dict]:
+        return [
+            {"function": location, "samples": count}
+            for location, count in self.samples.most_common(limit)
+        ]
+
+
+class RequestProfile:
+    """Datos de perfilado de una petición: muestras de CPU y sentencias SQL"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = time.perf_counter()
+        self.duration_ms = 0.0
+        self.sampler = StackSampler()
+        # Totales exactos y agregados por sentencia (hasta PROFILE_MAX_STATEMENTS distintas)
+        self.query_count = 0
+        self.query_time_ms = 0.0
+        self.statements: Dict[str, Dict] = {}
+        self.untracked_queries = 0
+        self._lock = threading.Lock()
+
+    def record_query(self, statement: str, duration: float, error: Optional[str] = None):
+        duration_ms = duration * 1000
+        with self._lock:
+            self.query_count += 1
+            self.query_time_ms += duration_ms
+            stats = self.statements.get(statement)
+            if stats is None:
+                if len(self.statements) >= PROFILE_MAX_STATEMENTS:
+                    self.untracked_queries += 1
+                    return
+                stats = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0}
+                self.statements[statement] = stats
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            if error is not None:
+                stats["errors"] += 1
+                stats["last_error"] = error
+
+    def finish(self):
+        self.sampler.stop()
+        self.duration_ms = (time.perf_counter() - self.started_at) * 1000
+
+    def repeated_queries(self) -> List[Dict]:
+        """Sentencias repetidas en la misma petición (posible N+1)"""
+        repeated = [
+            {"statement": statement, "count": stats["count"]}
+            for statement, stats in self.statements.items()
+            if stats["count"] >= PROFILE_REPEAT_THRESHOLD
+        ]
+        return sorted(repeated, key=lambda item: item["count"], reverse=True)
+
+    def statement_summary(self) -> List[Dict]:
+        """Sentencias agregadas, ordenadas por tiempo total"""
+        summary = [
+            {
+                "statement": statement,
+                **stats,
+                "total_ms": round(stats["total_ms"], 2),
+                "max_ms": round(stats["max_ms"], 2),
+            }
+            for statement, stats in self.statements.items()
+        ]
+        return sorted(summary, key=lambda item: item["total_ms"], reverse=True)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Profile-Id": self.id,
+            "X-Profile-Duration-Ms": f"{self.duration_ms:.2f}",
+            "X-SQL-Query-Count": str(self.query_count),
+            "X-SQL-Time-Ms": f"{self.query_time_ms:.2f}",
+            "X-SQL-Repeated": str(len(self.repeated_queries())),
+        }
+
+    def report(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.duration_ms, 2),
+            "profile": {
+                "interval_ms": self.sampler.interval * 1000,
+                "samples": self.sampler.total,
+                "scope": "threadpool",
+                "note": "El tiempo de handlers async en el event loop no se muestrea",
+                "top": self.sampler.top(),
+            },
+            "sql": {
+                "count": self.query_count,
+                "time_ms": round(self.query_time_ms, 2),
+                "statements": self.statement_summary(),
+                "untracked": self.untracked_queries,
+                "repeated": self.repeated_queries(),
+            },
+        }
+
+
+class ProfileStore:
+    """Reportes recientes de perfilado, limitados a ``max_reports``"""
+
+    def __init__(self, max_reports: int = PROFILE_MAX_REPORTS):
+        self.max_reports = max_reports
+        self._reports: "collections.OrderedDict[str, Dict]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._reports[profile.id] = profile.report()
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._reports.get(profile_id)
+
+
+profile_store = ProfileStore()
+
+
+def start_profile(method: str, path: str) -> tuple:
+    """Iniciar el perfilado de la petición actual"""
+    profile = RequestProfile(method, path)
+    token = _current_profile.set(profile)
+    profile.sampler.start()
+    return profile, token
+
+
+def finish_profile(profile: RequestProfile, token: contextvars.Token):
+    """Finalizar el perfilado y guardar el reporte"""
+    profile.finish()
+    _current_profile.reset(token)
+    profile_store.add(profile)
+
+
+def instrument_threadpool():
+    """Muestrear también los hilos del threadpool que ejecutan handlers y dependencias síncronas"""
+    run_sync = anyio.to_thread.run_sync
+
+    @functools.wraps(run_sync)
+    async def profiled_run_sync(func, *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return await run_sync(func, *args, **kwargs)
+
+        def tracked(*func_args):
+            thread_id = threading.get_ident()
+            profile.sampler.add_thread(thread_id)
+            try:
+                return func(*func_args)
+            finally:
+                profile.sampler.remove_thread(thread_id)
+
+        return await run_sync(tracked, *args, **kwargs)
+
+    anyio.to_thread.run_sync = profiled_run_sync
+
+
+def instrument_engine(engine):
+    """Registrar cada sentencia SQL ejecutada por el engine en el perfil activo"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current_profile.get() is not None:
+            context._profile_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        started = getattr(context, "_profile_query_start", None)
+        if profile is not None and started is not None:
+            profile.record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        profile = _current_profile.get()
+        started = getattr(exception_context.execution_context, "_profile_query_start", None)
+        if profile is not None and started is not None:
+            profile.record_query(
+                exception_context.statement,
+                time.perf_counter() - started,
+                error=type(exception_context.original_exception).__name__
+            )
@@ -0,0 +1,136 @@
+import copy
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """Llamada en curso compartida por todos los solicitantes de una misma clave"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self.generation = 0
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes idénticas en una sola ejecución.
+
+    Mientras una llamada para una clave está en curso, las demás llamadas con
+    la misma clave esperan y reciben el mismo resultado (o la misma excepción).
+    Opcionalmente el resultado se conserva durante ``ttl`` segundos. Cada
+    llamador recibe su propia copia del resultado, de modo que modificarla no
+    afecta a otras peticiones ni a la caché.
+    """
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, tuple] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self._generation = 0
+
+    def _metric(self, key: str) -> Dict[str, int]:
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = {"calls": 0, "executions": 0, "coalesced": 0, "cache_hits": 0, "errors": 0}
+            self._metrics[key] = metric
+        return metric
+
+    def do(self, key: Hashable, fn: Callable[[], Any], metric_key: Optional[str] = None) -> Any:
+        """Ejecutar ``fn`` una sola vez por clave entre llamadas concurrentes.
+
+        Las métricas se agrupan por ``metric_key`` (por defecto la clave), para
+        no acumular una entrada por cada combinación de argumentos.
+        """
+        if metric_key is None:
+            metric_key = str(key)
+        with self._lock:
+            metric = self._metric(metric_key)
+            metric["calls"] += 1
+
+            cached = self._results.get(key)
+            if cached is not None:
+                expires_at, value = cached
+                if time.monotonic() < expires_at:
+                    metric["cache_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._results[key]
+
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                metric["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                call.generation = self._generation
+                self._calls[key] = call
+                metric["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                # Cada hilo lanza su propia copia para no mezclar tracebacks
+                try:
+                    error = copy.copy(call.error)
+                except Exception:
+                    error = call.error
+                if error is call.error:
+                    raise error.with_traceback(None)
+                raise error.with_traceback(None) from call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                if call.error is not None:
+                    self._metric(metric_key)["errors"] += 1
+                elif self.ttl > 0 and call.generation == self._generation:
+                    self._results[key] = (time.monotonic() + self.ttl, call.result)
+            call.done.set()
+        return copy.deepcopy(call.result)
+
+    def forget(self, key: Optional[Hashable] = None):
+        """Descartar resultados en caché (de una clave o de todas)"""
+        with self._lock:
+            # Las llamadas en curso ya no deben publicar su resultado en caché
+            self._generation += 1
+            if key is None:
+                self._results.clear()
+                self._calls.clear()
+            else:
+                self._results.pop(key, None)
+                self._calls.pop(key, None)
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        """Obtener métricas de llamadas agrupadas"""
+        with self._lock:
+            return {key: dict(value) for key, value in self._metrics.items()}
+
+
+def coalesce(group: SingleFlight, name: Optional[str] = None):
+    """Decorador que agrupa llamadas concurrentes con los mismos argumentos.
+
+    Las métricas se registran por nombre de método, no por argumentos.
+    """
+    def decorator(func):
+        prefix = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = (prefix, *args, *sorted(kwargs.items())) if args or kwargs else prefix
+            return group.do(key, lambda: func(self, *args, **kwargs), metric_key=prefix)
+        return wrapper
+    return decorator
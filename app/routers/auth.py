@@ -17,7 +17,7 @@ class RegisterRequest(BaseModel):
 router = APIRouter()
 
 @router.post("/register")
-async def register(request: RegisterRequest):
+def register(request: RegisterRequest):
     """Registrar un nuevo usuario"""
     try:
         user_role = UserRole(request.role)
@@ -28,7 +28,7 @@ async def register(request: RegisterRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login")
-async def login(credentials: UserLogin):
+def login(credentials: UserLogin):
     """Iniciar sesión y obtener token de acceso"""
     print(f"DEBUG: Login attempt for email: {credentials.email}")
     print(f"DEBUG: Request received at /api/auth/login")
@@ -89,7 +89,7 @@ async def logout(current_user: User = Depends(get_current_active_user)):
     return {"message": "Sesión cerrada exitosamente"}
 
 @router.post("/reset-password")
-async def reset_password(email: str):
+def reset_password(email: str):
     """Restablecer contraseña (simulado - en producción enviaría email)"""
     user = db.get_user_by_email(email)
     if not user:
@@ -101,7 +101,7 @@ async def reset_password(email: str):
     return {"message": "Si el email existe, se ha enviado un enlace de restablecimiento"}
 
 @router.put("/profile")
-async def update_profile(
+def update_profile(
     profile_data: UserUpdate,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -3,16 +3,17 @@ from typing import List, Dict
 from ..models.user import User, UserCreate, UserUpdate
 from ..models.database import db
 from ..utils.auth import get_current_active_user, require_admin
-from ..models.user import UserRole
 
 router = APIRouter()
 
 @router.get("/usuarios", response_model=List[User])
-async def get_usuarios(current_user: User = Depends(require_admin)):
+def get_usuarios(current_user: User = Depends(require_admin)):
     """Obtener lista de todos los usuarios (solo administradores)"""
     try:
         users = db.get_all_users()
         return users
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -20,7 +21,7 @@ async def get_usuarios(current_user: User = Depends(require_admin)):
         )
 
 @router.post("/usuarios")
-async def create_usuario(
+def create_usuario(
     user_data: UserCreate,
     current_user: User = Depends(require_admin)
 ):
@@ -36,6 +37,8 @@ async def create_usuario(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -43,7 +46,7 @@ async def create_usuario(
         )
 
 @router.put("/usuarios/{user_id}")
-async def update_usuario(
+def update_usuario(
     user_id: int,
     user_data: UserUpdate,
     current_user: User = Depends(require_admin)
@@ -74,7 +77,7 @@ async def update_usuario(
         )
 
 @router.delete("/usuarios/{user_id}")
-async def delete_usuario(
+def delete_usuario(
     user_id: int,
     current_user: User = Depends(require_admin)
 ):
@@ -107,24 +110,28 @@ async def delete_usuario(
         )
 
 @router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: User = Depends(get_current_active_user)):
+def get_dashboard_stats(current_user: User = Depends(get_current_active_user)):
     """Obtener estadísticas del dashboard"""
     try:
-        users = db.get_all_users()
-        total_users = len(users)
-        admin_count = len([u for u in users if u.role == UserRole.ADMINISTRADOR])
-        consulta_count = len([u for u in users if u.role == UserRole.CONSULTA])
+        stats = db.get_user_stats()
 
         return {
-            "participantes": total_users,  # Simulado para compatibilidad
+            "participantes": stats["total_users"],  # Simulado para compatibilidad
             "mensualidades": 0,  # Simulado para compatibilidad
-            "total_users": total_users,
-            "admin_users": admin_count,
-            "consulta_users": consulta_count
+            "total_users": stats["total_users"],
+            "admin_users": stats["admin_users"],
+            "consulta_users": stats["consulta_users"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "participantes": 0,
             "mensualidades": 0,
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+@router.get("/dashboard/read-metrics")
+async def get_read_metrics(current_user: User = Depends(require_admin)) -> Dict[str, Dict[str, int]]:
+    """Obtener métricas de lecturas agrupadas (solo administradores)"""
+    return db.get_read_metrics()
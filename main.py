@@ -1,12 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, status, Depends
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 import os
+import random
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
 from app.routers import auth, dashboard
+from app.core import profiling
+from app.models.database import engine, db, db_breaker
+from app.models.user import User, UserRole
+from app.utils.auth import get_current_user, require_admin
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -30,11 +38,84 @@ app.add_middleware(
 app.include_router(auth.router, prefix="", tags=["authentication"])
 app.include_router(dashboard.router, prefix="", tags=["dashboard"])
 
+# Perfilado por petición (solo si PROFILING_ENABLED; sin costo cuando está desactivado)
+async def should_profile(request: Request) -> bool:
+    """Perfilar si un administrador lo solicita por header o por muestreo"""
+    if request.headers.get(profiling.PROFILE_HEADER):
+        authorization = request.headers.get("Authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            # Mismo criterio que require_admin: el rol se toma de la base de datos
+            credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+            try:
+                user = await run_in_threadpool(get_current_user, credentials)
+            except HTTPException:
+                return False
+            return user.role == UserRole.ADMINISTRADOR
+        return False
+    return profiling.PROFILE_SAMPLE_RATE > 0 and random.random() < profiling.PROFILE_SAMPLE_RATE
+
+if profiling.PROFILING_ENABLED:
+    profiling.instrument_engine(engine)
+    profiling.instrument_threadpool()
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not await should_profile(request):
+            return await call_next(request)
+
+        profile, token = profiling.start_profile(request.method, request.url.path)
+        try:
+            response = await call_next(request)
+        finally:
+            profiling.finish_profile(profile, token)
+        response.headers.update(profile.headers())
+        return response
+
+    @app.get("/debug/profiles/{profile_id}", tags=["debug"])
+    async def get_profile(profile_id: str, current_user: User = Depends(require_admin)):
+        """Obtener reporte de perfilado de una petición (solo administradores)"""
+        report = profiling.profile_store.get(profile_id)
+        if report is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Reporte de perfilado no encontrado"
+            )
+        return report
+
 @app.get("/health")
 async def health_check():
     """Endpoint de health check"""
     return {"status": "healthy", "service": "fastapi_auth"}
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: el proceso está en ejecución"""
+    return {"status": "alive", "service": "fastapi_auth"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """Readiness: la base de datos responde y el circuito está cerrado"""
+    try:
+        database = {"status": "up", **db.check_health()}
+    except HTTPException as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "status": "unavailable",
+                "service": "fastapi_auth",
+                "database": {"status": "down"},
+                "circuit_breaker": db_breaker.snapshot()
+            },
+            headers=e.headers
+        )
+    return {
+        "status": "ready",
+        "service": "fastapi_auth",
+        "database": database,
+        "circuit_breaker": db_breaker.snapshot()
+    }
+
 @app.get("/")
 async def root():
     """Endpoint raíz"""
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert 0 < excinfo.value.retry_after <= 60
+    assert 0 < breaker.retry_after() <= 60
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    open_breaker(breaker)
+    time.sleep(0.02)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 0
+
+    breaker.record_success(probe=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    open_breaker(breaker)
+    time.sleep(0.02)
+
+    probe = breaker.before_call()
+    breaker.record_failure(probe)
+    assert breaker.snapshot()["state"] == CircuitBreaker.OPEN
+
+
+def test_only_the_probe_closes_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    # Llamada lenta iniciada con el circuito cerrado
+    late = breaker.before_call()
+    open_breaker(breaker)
+
+    breaker.record_success(late)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["failures"] == 0
+
+    breaker.reset_timeout = 0
+    probe = breaker.before_call()
+    # Un éxito ajeno a la prueba tampoco cierra el circuito half_open
+    breaker.record_success(False)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record_success(probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_release_frees_the_probe_without_changing_state():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    open_breaker(breaker)
+    time.sleep(0.02)
+
+    probe = breaker.before_call()
+    # Error ajeno a la base de datos (p. ej. pool agotado) durante la prueba
+    breaker.release(probe)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.snapshot()["failures"] == 1
+
+    assert breaker.before_call() is True
+
+
+def test_release_outside_probe_does_not_count_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(5):
+        probe = breaker.before_call()
+        breaker.release(probe)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["failures"] == 0
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from app.core.singleflight import SingleFlight, coalesce
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condición no alcanzada a tiempo")
+        time.sleep(0.005)
+
+
+def start_waiters(group, key, fn, count):
+    """Lanzar ``count`` hilos que llaman a ``group.do`` y recogen resultado o excepción"""
+    outcomes = []
+    lock = threading.Lock()
+
+    def run():
+        try:
+            outcome = group.do(key, fn)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait()
+        return [1, 2, 3]
+
+    threads, outcomes = start_waiters(group, "key", fn, 5)
+    wait_for(lambda: group.metrics().get("key", {}).get("coalesced") == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert outcomes == [[1, 2, 3]] * 5
+    # Cada llamador recibe su propia copia
+    assert len({id(outcome) for outcome in outcomes}) == 5
+
+
+def test_leader_error_reaches_all_waiters():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait()
+        raise ValueError("boom")
+
+    threads, outcomes = start_waiters(group, "key", fn, 4)
+    wait_for(lambda: group.metrics().get("key", {}).get("coalesced") == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == 4
+    assert all(isinstance(outcome, ValueError) and str(outcome) == "boom" for outcome in outcomes)
+    # Los hilos no comparten el mismo objeto de excepción
+    assert len({id(outcome) for outcome in outcomes}) == 4
+    assert group.metrics()["key"]["errors"] == 1
+
+
+def test_forget_during_call_does_not_cache_stale_result():
+    group = SingleFlight(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+
+    def stale():
+        started.set()
+        release.wait()
+        return "stale"
+
+    threads, outcomes = start_waiters(group, "key", stale, 1)
+    started.wait()
+    group.forget()
+    release.set()
+    threads[0].join()
+
+    assert outcomes == ["stale"]
+    assert group.do("key", lambda: "fresh") == "fresh"
+
+
+def test_ttl_cache_hit_returns_copy():
+    group = SingleFlight(ttl=60)
+    first = group.do("key", lambda: {"total": 1})
+    first["total"] = 99
+
+    assert group.do("key", lambda: {"total": 2}) == {"total": 1}
+    assert group.metrics()["key"]["cache_hits"] == 1
+
+
+def test_coalesce_metrics_are_keyed_by_method_name():
+    group = SingleFlight()
+
+    class Service:
+        @coalesce(group)
+        def lookup(self, email):
+            return email
+
+    service = Service()
+    for i in range(10):
+        service.lookup(f"user{i}@example.com")
+
+    assert list(group.metrics()) == ["lookup"]
+    assert group.metrics()["lookup"]["calls"] == 10
+
+
+def test_leader_exception_is_raised_to_leader():
+    group = SingleFlight()
+
+    with pytest.raises(KeyError):
+        group.do("key", lambda: {}["missing"])